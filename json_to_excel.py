@@ -9,172 +9,448 @@ and generates an Excel file formatted according to a specific template.
 import json
 import os
 import argparse
-import pandas as pd
-from openpyxl import load_workbook
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import tempfile
+import zipfile
+
+# Prefer orjson for parsing when available; it decodes raw bytes several
+# times faster than the stdlib. json.loads accepts bytes too, so the
+# fallback shares the same call signature.
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# ijson enables stream-parsing of inputs too large to load in one piece
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# xlsxwriter offers a constant-memory streaming writer as a third engine
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+from xml.sax.saxutils import escape as _escape
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+
+# Column order matches the Excel template.
+HEADERS = ('Text Type', 'Paragraph ID', 'Publication ID', 'Task Text',
+           'Tag', 'Similarity Score', 'Reasonings')
+
+# Inputs larger than this are stream-parsed instead of loaded whole
+STREAM_THRESHOLD = 100 * 1024 * 1024  # 100 MB
+
+# Shared style singletons for the openpyxl engine. Reusing the same objects
+# for every cell lets openpyxl's style table collapse them to two xf records
+# instead of one per cell.
+_HEAD_FONT = Font(bold=True)
+_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+_HEAD_ALIGN = Alignment(wrap_text=True, vertical='center')
+_BODY_ALIGN = Alignment(wrap_text=True, vertical='top')
+
+# Fixed XML parts of the xlsx package. Only the worksheet varies per run;
+# everything else is static boilerplate required by the OOXML format.
+_XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+
+_XLSX_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+_XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+_XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+# Two shared cell styles: xf 1 is the bold/bordered header style,
+# xf 2 the wrapped/bordered body style. Every cell references one of them.
+_XLSX_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border><border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="3">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1" applyAlignment="1"><alignment vertical="center" wrapText="1"/></xf>
+<xf numFmtId="0" fontId="0" fillId="0" borderId="1" xfId="0" applyBorder="1" applyAlignment="1"><alignment vertical="top" wrapText="1"/></xf>
+</cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
 
 def parse_arguments():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description='Convert JSON data to Excel format.')
     parser.add_argument('--input', '-i', required=True, help='Input JSON file path')
     parser.add_argument('--output', '-o', required=True, help='Output Excel file path')
+    parser.add_argument('--engine', choices=['xml', 'xlsxwriter', 'openpyxl'], default='xml',
+                        help='Excel writer backend (default: xml)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of worker processes for row extraction (default: 1)')
     return parser.parse_args()
 
 def load_json_data(file_path):
     """Load and validate JSON data from file."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-        return data
-    except json.JSONDecodeError:
+        # Read bytes and let the parser handle UTF-8 in one step
+        with open(file_path, 'rb') as file:
+            return _loads(file.read())
+    # Both json.JSONDecodeError and orjson.JSONDecodeError subclass ValueError
+    except ValueError:
         print(f"Error: Invalid JSON format in {file_path}")
         exit(1)
     except FileNotFoundError:
         print(f"Error: File not found at {file_path}")
         exit(1)
 
-def process_json_data(json_data):
+def iter_items(json_data):
     """
-    Process JSON data to extract and format high-order and low-order text relationships.
-    Extracts only from payload.results, ignores metadata, and ensures reasoning is shown only once per publication per high-order text.
-    Returns a list of dictionaries ready for DataFrame creation.
+    Return the result items from an already-loaded JSON tree.
+    Supports multiple JSON root structures.
     """
-    rows = []
-
-    # Support multiple JSON root structures
     if isinstance(json_data, dict) and 'payload' in json_data and 'results' in json_data['payload']:
-        items = json_data['payload']['results']
-    elif isinstance(json_data, list):
-        items = json_data
-    elif isinstance(json_data, dict):
-        items = [json_data]
-    else:
-        print("Error: Unsupported JSON structure.")
-        exit(1)
+        return json_data['payload']['results']
+    if isinstance(json_data, list):
+        return json_data
+    if isinstance(json_data, dict):
+        return [json_data]
+    print("Error: Unsupported JSON structure.")
+    exit(1)
+
+def iter_items_streaming(file_path):
+    """
+    Yield result items one at a time using ijson.
+    Peak memory stays at a single item instead of the whole file, so inputs
+    larger than RAM remain processable. Supports the same root structures as
+    iter_items: list roots stream every element, dict roots stream
+    payload.results, and a dict root without payload.results falls back to
+    the in-memory path rather than silently yielding nothing.
+    """
+    with open(file_path, 'rb') as file:
+        # Sniff the first non-whitespace byte to pick the stream prefix
+        first = file.read(1)
+        while first.isspace():
+            first = file.read(1)
+        file.seek(0)
+        # use_float makes ijson yield floats like the in-memory parsers,
+        # not decimal.Decimal, so both paths produce identical values
+        if first == b'[':
+            yield from ijson.items(file, 'item', use_float=True)
+            return
+        found = False
+        for item in ijson.items(file, 'payload.results.item', use_float=True):
+            found = True
+            yield item
+    if not found:
+        # Dict root without payload.results, e.g. a single result item
+        yield from iter_items(load_json_data(file_path))
 
-    for item in items:
-        high_order_texts = item.get('high_order_text', [])
-        reasonings = item.get('reasonings', [])
-        # Build publication reasoning map for quick lookup
-        pub_reasoning_map = {str(r.get('publication_ID', '')): r.get('reasoning', '') for r in reasonings}
-        # For each high-order text
-        for hot in high_order_texts:
-            # Add high-order text row (no reasoning)
-            high_order_row = {
-                'Text Type': 'High-Order Text',
-                'Paragraph ID': hot.get('paragraph_ID', ''),
-                'Publication ID': hot.get('publication_ID', ''),
-                'Task Text': hot.get('text', ''),
-                'Tag': ', '.join(hot.get('tags', [])),
-                'Similarity Score': 'N/A',
-                'Reasonings': ''
-            }
-            rows.append(high_order_row)
-            # Track which publications have shown reasoning for this high-order text
-            reasoning_shown = set()
-            # For each low-order text
-            for lot in hot.get('low_order_texts', []):
-                publication_id = str(lot.get('publication_ID', ''))
-                paragraph_id = lot.get('paragraph_ID', '')
-                # Only show reasoning for first occurrence of this publication_id under this high-order text
-                reasoning_text = ''
-                if publication_id and publication_id not in reasoning_shown:
-                    reasoning_text = pub_reasoning_map.get(publication_id, '')
-                    reasoning_shown.add(publication_id)
-                low_order_row = {
-                    'Text Type': 'Low-Order Text',
-                    'Paragraph ID': paragraph_id,
-                    'Publication ID': publication_id,
-                    'Task Text': lot.get('text', ''),
-                    'Tag': f"INCON-{hot.get('paragraph_ID', '')}",
-                    'Similarity Score': lot.get('similarity_score', ''),
-                    'Reasonings': reasoning_text
-                }
-                rows.append(low_order_row)
+def _process_item(item):
+    """Return the spreadsheet rows for a single result item, in HEADERS order."""
+    rows = []
+    high_order_texts = item.get('high_order_text', [])
+    reasonings = item.get('reasonings', [])
+    # Build publication reasoning map for quick lookup
+    pub_reasoning_map = {str(r.get('publication_ID', '')): r.get('reasoning', '') for r in reasonings}
+    # Bind hot-loop lookups to locals to cut per-row attribute resolution
+    append = rows.append
+    get_reasoning = pub_reasoning_map.get
+    # For each high-order text
+    for hot in high_order_texts:
+        hg = hot.get
+        hot_para = hg('paragraph_ID', '')
+        tags = hg('tags')
+        # High-order text row (no reasoning)
+        append(('High-Order Text',
+                hot_para,
+                hg('publication_ID', ''),
+                hg('text', ''),
+                ', '.join(tags) if tags else '',
+                'N/A',
+                ''))
+        # Track which publications have shown reasoning for this high-order text
+        reasoning_shown = set()
+        # For each low-order text
+        for lot in hg('low_order_texts', []):
+            lg = lot.get
+            # Coerce once, and only when the id is not already a string
+            pub = lg('publication_ID', '')
+            publication_id = pub if type(pub) is str else str(pub)
+            paragraph_id = lg('paragraph_ID', '')
+            # Only show reasoning for first occurrence of this publication_id
+            # under this high-order text; adding first and comparing sizes
+            # hashes the id once instead of twice (probe + add)
+            reasoning_text = ''
+            if publication_id:
+                before = len(reasoning_shown)
+                reasoning_shown.add(publication_id)
+                if len(reasoning_shown) != before:
+                    reasoning_text = get_reasoning(publication_id, '')
+            append(('Low-Order Text',
+                    paragraph_id,
+                    publication_id,
+                    lg('text', ''),
+                    f"INCON-{hot_para}",
+                    lg('similarity_score', ''),
+                    reasoning_text))
     return rows
 
-def create_excel_file(data_rows, output_path):
+def iter_rows(items, jobs=1):
+    """
+    Yield spreadsheet rows extracted from the result items, in HEADERS order.
+    Ignores metadata, and ensures reasoning is shown only once per publication per high-order text.
+    Rows are generated lazily so they can stream straight into the Excel writer.
+    With jobs > 1, items are fanned out to a process pool; reasoning dedup is
+    scoped to a single high-order text, so per-item workers preserve the
+    output exactly, and results come back in submission order. Only a bounded
+    window of items is in flight at a time, so streaming inputs stay O(window)
+    in memory.
     """
-    Create an Excel file from the processed data.
-    
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # executor.map would drain the item iterator up front, defeating
+            # the ijson streaming path; submit a bounded window of futures
+            # and top it up as results are consumed
+            items = iter(items)
+            window = deque()
+            for item in islice(items, jobs * 8):
+                window.append(executor.submit(_process_item, item))
+            while window:
+                rows = window.popleft().result()
+                for item in islice(items, 1):
+                    window.append(executor.submit(_process_item, item))
+                yield from rows
+    else:
+        for item in items:
+            yield from _process_item(item)
+
+def create_excel_file(data_rows, output_path, engine='xml'):
+    """
+    Create a styled Excel file from the processed data.
+
     Args:
-        data_rows: List of dictionaries containing row data
+        data_rows: Iterable of row tuples in HEADERS order
         output_path: Path for the output Excel file
+        engine: 'xml' generates the workbook XML directly (fastest),
+                'xlsxwriter' streams through xlsxwriter's constant-memory
+                mode, 'openpyxl' uses openpyxl's write-only mode
     """
-    # Create DataFrame from processed data
-    df = pd.DataFrame(data_rows)
-    
-    # Write DataFrame to Excel without index
-    df.to_excel(output_path, index=False, engine='openpyxl')
-    
-    # Apply formatting to match template
-    format_excel_file(output_path)
-    
+    if engine == 'xml':
+        write_xlsx_stream(data_rows, HEADERS, output_path)
+    elif engine == 'xlsxwriter':
+        if xlsxwriter is None:
+            print("Error: xlsxwriter is not installed.")
+            exit(1)
+        _write_xlsxwriter(data_rows, output_path)
+    else:
+        write_styled_xlsx(data_rows, HEADERS, output_path)
+
     print(f"Excel file created successfully at: {output_path}")
 
-def format_excel_file(file_path):
+def _sheet_row(number, values, style, letters):
+    """Serialize one worksheet row as a <row> XML fragment."""
+    cells = []
+    for value, letter in zip(values, letters):
+        if value is None or value == '':
+            cells.append(f'<c r="{letter}{number}" s="{style}"/>')
+        elif value is True or value is False:
+            cells.append(f'<c r="{letter}{number}" s="{style}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c r="{letter}{number}" s="{style}"><v>{value}</v></c>')
+        else:
+            text = value if type(value) is str else str(value)
+            # Drop control characters that are legal in JSON strings but
+            # not in XML 1.0; openpyxl refuses them, and writing them raw
+            # would corrupt the worksheet
+            text = ILLEGAL_CHARACTERS_RE.sub('', text)
+            # Most cells contain no XML-special characters; skip the
+            # escape call's replace passes for those
+            if '&' in text or '<' in text or '>' in text:
+                text = _escape(text)
+            # xml:space keeps Excel from trimming leading/trailing whitespace
+            cells.append(f'<c r="{letter}{number}" s="{style}" t="inlineStr">'
+                         f'<is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+def write_xlsx_stream(rows, columns, path):
     """
-    Apply formatting to the Excel file to match the template.
-    
+    Write a styled xlsx file by generating its XML parts directly.
+
+    Bypasses the openpyxl object model entirely: the fixed workbook parts
+    are static strings and the worksheet streams row by row into the zip
+    archive, so no per-cell Python objects are built and memory stays flat
+    regardless of row count.
+
+    Args:
+        rows: Iterable of row value sequences in column order
+        columns: Sequence of column header names
+        path: Path for the output Excel file
+    """
+    letters = [get_column_letter(index + 1) for index in range(len(columns))]
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _XLSX_WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', _XLSX_STYLES)
+
+        # Column widths are tracked during the same pass that serializes the
+        # rows, but <cols> has to precede <sheetData> in the worksheet XML,
+        # so the row data is spooled to a temp file and copied in afterwards
+        widths = [len(header) for header in columns]
+        with tempfile.TemporaryFile() as body:
+            body.write(_sheet_row(1, columns, 1, letters).encode('utf-8'))
+            for number, row in enumerate(rows, start=2):
+                for index, value in enumerate(row):
+                    if value is None:
+                        continue
+                    length = len(value) if type(value) is str else len(str(value))
+                    if length > widths[index]:
+                        widths[index] = length
+                body.write(_sheet_row(number, row, 2, letters).encode('utf-8'))
+            body.seek(0)
+
+            cols = ''.join(
+                f'<col min="{index + 1}" max="{index + 1}" width="{min(width + 2, 50)}" customWidth="1"/>'
+                for index, width in enumerate(widths))
+            with zf.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+                sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">')
+                sheet.write(f'<cols>{cols}</cols>'.encode('utf-8'))
+                sheet.write(b'<sheetData>')
+                shutil.copyfileobj(body, sheet)
+                sheet.write(b'</sheetData></worksheet>')
+
+def _write_xlsxwriter(data_rows, output_path):
+    """
+    Write a styled Excel file with xlsxwriter in constant-memory mode.
+
+    constant_memory flushes each row to disk as it is written, so peak
+    memory stays at a single row like the XML engine, while reusing a
+    mature writer. Formats are created once and shared by every cell.
+
     Args:
-        file_path: Path to the Excel file to format
+        data_rows: Iterable of row tuples in HEADERS order
+        output_path: Path for the output Excel file
     """
-    # Load the workbook
-    wb = load_workbook(file_path)
-    ws = wb.active
-    
-    # Define styles
-    header_font = Font(bold=True)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    
-    # Format header row
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.alignment = Alignment(wrap_text=True, vertical='center')
-        cell.border = border
-    
-    # Format data rows
-    for row in ws.iter_rows(min_row=2):
-        for cell in row:
-            cell.alignment = Alignment(wrap_text=True, vertical='top')
-            cell.border = border
-    
-    # Auto-adjust column widths
-    for column in ws.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        
-        adjusted_width = min(max_length + 2, 50)  # Cap width at 50 characters
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save the formatted workbook
-    wb.save(file_path)
+    wb = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+    ws = wb.add_worksheet('Sheet1')
+    header_format = wb.add_format(
+        {'bold': True, 'text_wrap': True, 'border': 1, 'valign': 'vcenter'})
+    body_format = wb.add_format(
+        {'text_wrap': True, 'border': 1, 'valign': 'top'})
+
+    ws.write_row(0, 0, HEADERS, header_format)
+    widths = [len(header) for header in HEADERS]
+    for number, row in enumerate(data_rows, start=1):
+        for index, value in enumerate(row):
+            if value is None:
+                continue
+            length = len(value) if type(value) is str else len(str(value))
+            if length > widths[index]:
+                widths[index] = length
+        ws.write_row(number, 0, row, body_format)
+
+    # Column widths may be set after the data in constant-memory mode;
+    # they are kept separately and serialized on close
+    for index, width in enumerate(widths):
+        ws.set_column(index, index, min(width + 2, 50))
+    wb.close()
+
+def write_styled_xlsx(rows, headers, path):
+    """
+    Write a styled Excel file with openpyxl's write-only mode in one pass.
+
+    Args:
+        rows: Iterable of row value sequences in column order
+        headers: Sequence of column header names
+        path: Path for the output Excel file
+    """
+    # Widths have to be known before the first append, so this engine needs
+    # two passes over the rows and therefore materializes them
+    rows = list(rows)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+
+    # Write-only sheets emit column definitions before the first row, so
+    # column widths have to be known up front
+    widths = [len(header) for header in headers]
+    for row in rows:
+        for index, value in enumerate(row):
+            if value is None:
+                continue
+            length = len(value) if type(value) is str else len(str(value))
+            if length > widths[index]:
+                widths[index] = length
+    for index, width in enumerate(widths):
+        column_letter = get_column_letter(index + 1)
+        ws.column_dimensions[column_letter].width = min(width + 2, 50)  # Cap width at 50 characters
+
+    # Header row
+    header_row = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = _HEAD_FONT
+        cell.alignment = _HEAD_ALIGN
+        cell.border = _BORDER
+        header_row.append(cell)
+    ws.append(header_row)
+
+    # Data rows
+    for row in rows:
+        body_row = []
+        for value in row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = _BODY_ALIGN
+            cell.border = _BORDER
+            body_row.append(cell)
+        ws.append(body_row)
+
+    wb.save(path)
 
 def main():
     """Main execution function."""
     # Parse command line arguments
     args = parse_arguments()
-    
-    # Load JSON data
-    json_data = load_json_data(args.input)
-    
-    # Process JSON data
-    processed_data = process_json_data(json_data)
-    
-    # Create Excel file
-    create_excel_file(processed_data, args.output)
+
+    # Stream-parse very large files; load smaller ones in one piece
+    if ijson is not None and os.path.isfile(args.input) and os.path.getsize(args.input) > STREAM_THRESHOLD:
+        items = iter_items_streaming(args.input)
+    else:
+        items = iter_items(load_json_data(args.input))
+
+    # Create Excel file, streaming rows straight from the JSON data
+    create_excel_file(iter_rows(items, jobs=args.jobs), args.output, engine=args.engine)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file